@@ -1,6 +1,4 @@
 import re
-from collections import defaultdict
-from functools import partial
 from typing import List, Tuple
 
 from qgistim.core import geopackage
@@ -50,6 +48,16 @@ ELEMENTS = {
 }
 
 
+LAYERNAME_PATTERN = re.compile(r"(timml|ttim) ([^:]+):([^:]*)$")
+ELEMENT_TYPE_MAPPING = {
+    "Computation Times": "Domain",
+    "Temporal Settings": "Aquifer",
+    "Polygon Inhomogeneity Properties": "Polygon Inhomogeneity",
+    "Building Pit Properties": "Building Pit",
+    "Leaky Building Pit Properties": "Leaky Building Pit",
+}
+
+
 def parse_name(layername: str) -> Tuple[str, str, str]:
     """
     Based on the layer name find out:
@@ -61,25 +69,13 @@ def parse_name(layername: str) -> Tuple[str, str, str]:
     For example:
     parse_name("timml Headwell:drainage") -> ("timml", "Head Well", "drainage")
     """
-    prefix, name = layername.split(":")
-    element_type = re.split("timml |ttim ", prefix)[1]
-    mapping = {
-        "Computation Times": "Domain",
-        "Temporal Settings": "Aquifer",
-        "Polygon Inhomogeneity Properties": "Polygon Inhomogeneity",
-        "Building Pit Properties": "Building Pit",
-        "Leaky Building Pit Properties": "Leaky Building Pit",
-    }
-    element_type = mapping.get(element_type, element_type)
-    if "timml" in prefix:
-        if "Properties" in prefix:
-            tim_type = "timml_assoc"
-        else:
-            tim_type = "timml"
-    elif "ttim" in prefix:
-        tim_type = "ttim"
-    else:
+    match = LAYERNAME_PATTERN.search(layername)
+    if match is None:
         raise ValueError("Neither timml nor ttim in layername")
+    tim_type, element_type, name = match.groups()
+    if tim_type == "timml" and "Properties" in element_type:
+        tim_type = "timml_assoc"
+    element_type = ELEMENT_TYPE_MAPPING.get(element_type, element_type)
     return tim_type, element_type, name
 
 
@@ -87,16 +83,11 @@ def load_elements_from_geopackage(path: str) -> List[Element]:
     # List the names in the geopackage
     gpkg_names = geopackage.layers(path)
 
-    # Group them on the basis of name
-    dd = defaultdict
-    grouped_names = dd(partial(dd, partial(dd, list)))
+    # Every element is identified by its type and name: its timml, ttim, and
+    # associated layers all map to the same key. Use a dict to keep the order.
+    keys = {}
     for layername in gpkg_names:
-        tim_type, element_type, name = parse_name(layername)
-        grouped_names[element_type][name][tim_type] = layername
-
-    elements = []
-    for element_type, group in grouped_names.items():
-        for name in group:
-            elements.append(ELEMENTS[element_type](path, name))
+        _, element_type, name = parse_name(layername)
+        keys[(element_type, name)] = None
 
-    return elements
+    return [ELEMENTS[element_type](path, name) for element_type, name in keys]
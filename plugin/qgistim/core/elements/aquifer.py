@@ -1,6 +1,5 @@
 from PyQt5.QtCore import QVariant
 from qgis.core import QgsDefaultValue, QgsField
-from qgistim.core import geopackage
 from qgistim.core.elements.element import ElementExtraction, TransientElement
 from qgistim.core.elements.schemata import SingleRowSchema, TableSchema
 from qgistim.core.schemata import (
@@ -48,7 +47,8 @@ class TemporalSettingsSchema(SingleRowSchema):
 class Aquifer(TransientElement):
     element_type = "Aquifer"
     geometry_type = "No Geometry"
-    timml_attributes = [
+    mandatory = True
+    timml_attributes = (
         QgsField("layer", QVariant.Int),
         QgsField("aquifer_top", QVariant.Double),
         QgsField("aquifer_bottom", QVariant.Double),
@@ -60,7 +60,7 @@ class Aquifer(TransientElement):
         QgsField("aquifer_s", QVariant.Double),
         QgsField("aquitard_npor", QVariant.Double),
         QgsField("aquifer_npor", QVariant.Double),
-    ]
+    )
     ttim_attributes = (
         QgsField("time_min", QVariant.Double),
         QgsField("laplace_inversion_M", QVariant.Int),
@@ -84,15 +84,6 @@ class Aquifer(TransientElement):
         self.timml_name = f"timml {self.element_type}:Aquifer"
         self.ttim_name = "ttim Temporal Settings:Aquifer"
 
-    def write(self):
-        self.timml_layer = geopackage.write_layer(
-            self.path, self.timml_layer, self.timml_name, newfile=True
-        )
-        self.ttim_layer = geopackage.write_layer(
-            self.path, self.ttim_layer, self.ttim_name
-        )
-        self.set_defaults()
-
     def remove_from_geopackage(self):
         """This element may not be removed."""
         return
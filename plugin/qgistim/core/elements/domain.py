@@ -3,9 +3,9 @@ from typing import Any, Tuple
 from PyQt5.QtCore import QVariant
 from qgis.core import (
     QgsFeature,
+    QgsFeatureSink,
     QgsField,
     QgsGeometry,
-    QgsPointXY,
     QgsSingleSymbolRenderer,
 )
 from qgistim.core.elements.colors import BLACK
@@ -24,6 +24,7 @@ class DomainSchema(SingleRowSchema):
 class Domain(TransientElement):
     element_type = "Domain"
     geometry_type = "Polygon"
+    mandatory = True
     ttim_attributes = (QgsField("time", QVariant.Double),)
     schema = DomainSchema()
 
@@ -45,25 +46,24 @@ class Domain(TransientElement):
         pass
 
     def update_extent(self, iface: Any) -> Tuple[float, float]:
-        provider = self.timml_layer.dataProvider()
-        provider.truncate()  # removes all features
         canvas = iface.mapCanvas()
         extent = canvas.extent()
-        xmin = extent.xMinimum()
-        ymin = extent.yMinimum()
-        xmax = extent.xMaximum()
-        ymax = extent.yMaximum()
-        points = [
-            QgsPointXY(xmin, ymax),
-            QgsPointXY(xmax, ymax),
-            QgsPointXY(xmax, ymin),
-            QgsPointXY(xmin, ymin),
-        ]
+        # Construct the rectangle in C++, rather than from Python points.
+        geometry = QgsGeometry.fromRect(extent)
+        # Leave the GeoPackage alone if the domain already has this extent.
+        if self.timml_layer.featureCount() == 1:
+            current = next(self.timml_layer.getFeatures())
+            if current.geometry().equals(geometry):
+                return extent.yMaximum(), extent.yMinimum()
+
+        provider = self.timml_layer.dataProvider()
+        provider.truncate()  # removes all features
         feature = QgsFeature()
-        feature.setGeometry(QgsGeometry.fromPolygonXY([points]))
-        provider.addFeatures([feature])
+        feature.setGeometry(geometry)
+        # FastInsert: the feature id need not be written back to the feature.
+        provider.addFeature(feature, QgsFeatureSink.FastInsert)
         canvas.refresh()
-        return ymax, ymin
+        return extent.yMaximum(), extent.yMinimum()
 
     def to_timml(self, other) -> ElementExtraction:
         data = self.table_to_records(layer=self.timml_layer)
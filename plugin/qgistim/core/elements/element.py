@@ -56,14 +56,6 @@ from collections import defaultdict
 from copy import deepcopy
 from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
 
-from PyQt5.QtWidgets import (
-    QDialog,
-    QHBoxLayout,
-    QLabel,
-    QLineEdit,
-    QPushButton,
-    QVBoxLayout,
-)
 from qgis.core import (
     QgsFillSymbol,
     QgsLineSymbol,
@@ -74,6 +66,19 @@ from qgis.core import (
 from qgistim.core import geopackage
 from qgistim.core.extractor import ExtractorMixin
 
+# Symbols by type and properties: parsing the properties of a simple symbol is
+# done once, renderers receive a clone.
+_SYMBOLS = {}
+
+
+def simple_symbol(symbol_type, properties: Dict[str, str]):
+    key = (symbol_type, tuple(sorted(properties.items())))
+    symbol = _SYMBOLS.get(key)
+    if symbol is None:
+        symbol = symbol_type.createSimple(properties)
+        _SYMBOLS[key] = symbol
+    return symbol.clone()
+
 
 class ElementExtraction(NamedTuple):
     errors: Optional[Dict[str, Any]] = None
@@ -81,27 +86,6 @@ class ElementExtraction(NamedTuple):
     times: Optional[Set[float]] = None
 
 
-class NameDialog(QDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.name_line_edit = QLineEdit()
-        self.ok_button = QPushButton("OK")
-        self.cancel_button = QPushButton("Cancel")
-        self.ok_button.clicked.connect(self.accept)
-        self.cancel_button.clicked.connect(self.reject)
-        first_row = QHBoxLayout()
-        first_row.addWidget(QLabel("Layer name"))
-        first_row.addWidget(self.name_line_edit)
-        second_row = QHBoxLayout()
-        second_row.addStretch()
-        second_row.addWidget(self.ok_button)
-        second_row.addWidget(self.cancel_button)
-        layout = QVBoxLayout()
-        layout.addLayout(first_row)
-        layout.addLayout(second_row)
-        self.setLayout(layout)
-
-
 class Element(ExtractorMixin, abc.ABC):
     """
     Abstract base class for "ordinary" timml elements.
@@ -109,6 +93,8 @@ class Element(ExtractorMixin, abc.ABC):
 
     element_type = None
     geometry_type = None
+    # Mandatory elements are part of every model and cannot be removed.
+    mandatory = False
     timml_attributes = ()
     ttim_attributes = ()
     assoc_attributes = ()
@@ -134,8 +120,11 @@ class Element(ExtractorMixin, abc.ABC):
 
     @classmethod
     def dialog(cls, path: str, crs: Any, iface: Any, names: List[str]):
+        # Import the Qt widgets lazily: they are only needed for user
+        # interaction, not for loading elements from a GeoPackage.
+        from qgistim.widgets.name_dialog import NameDialog
+
         dialog = NameDialog()
-        dialog.show()
         ok = dialog.exec_()
         if not ok:
             return
@@ -182,7 +171,9 @@ class Element(ExtractorMixin, abc.ABC):
             (self.timml_layer, self.ttim_layer, self.assoc_layer),
             (self.timml_defaults, self.ttim_defaults, self.assoc_defaults),
         ):
-            if layer is None:
+            # Most layers have no defaults: skip them without copying the
+            # fields.
+            if layer is None or not defaults:
                 continue
             fields = layer.fields()
             for name, definition in defaults.items():
@@ -192,17 +183,17 @@ class Element(ExtractorMixin, abc.ABC):
 
     @staticmethod
     def marker_renderer(**kwargs):
-        symbol = QgsMarkerSymbol.createSimple(kwargs)
+        symbol = simple_symbol(QgsMarkerSymbol, kwargs)
         return QgsSingleSymbolRenderer(symbol)
 
     @staticmethod
     def line_renderer(**kwargs):
-        symbol = QgsLineSymbol.createSimple(kwargs)
+        symbol = simple_symbol(QgsLineSymbol, kwargs)
         return QgsSingleSymbolRenderer(symbol)
 
     @staticmethod
     def polygon_renderer(**kwargs):
-        symbol = QgsFillSymbol.createSimple(kwargs)
+        symbol = simple_symbol(QgsFillSymbol, kwargs)
         return QgsSingleSymbolRenderer(symbol)
 
     @classmethod
@@ -210,9 +201,7 @@ class Element(ExtractorMixin, abc.ABC):
         return None
 
     def timml_layer_from_geopackage(self) -> QgsVectorLayer:
-        self.timml_layer = QgsVectorLayer(
-            f"{self.path}|layername={self.timml_name}", self.timml_name
-        )
+        self.timml_layer = geopackage.open_layer(self.path, self.timml_name)
 
     def ttim_layer_from_geopackage(self):
         return
@@ -227,11 +216,13 @@ class Element(ExtractorMixin, abc.ABC):
         self.set_defaults()
         return
 
+    def copy_layers(self, dataset) -> None:
+        """Copy the layers of the element into an open OGR dataset."""
+        geopackage.copy_layer(dataset, self.timml_layer, self.timml_name)
+
     def write(self):
-        self.timml_layer = geopackage.write_layer(
-            self.path, self.timml_layer, self.timml_name
-        )
-        self.set_defaults()
+        geopackage.write_transaction(self.path, self.copy_layers)
+        self.load_layers_from_geopackage()
 
     def remove_from_geopackage(self):
         geopackage.remove_layer(self.path, self.timml_name)
@@ -374,19 +365,11 @@ class TransientElement(Element, abc.ABC):
         )
 
     def ttim_layer_from_geopackage(self):
-        self.ttim_layer = QgsVectorLayer(
-            f"{self.path}|layername={self.ttim_name}",
-            self.ttim_name,
-        )
+        self.ttim_layer = geopackage.open_layer(self.path, self.ttim_name)
 
-    def write(self):
-        self.timml_layer = geopackage.write_layer(
-            self.path, self.timml_layer, self.timml_name
-        )
-        self.ttim_layer = geopackage.write_layer(
-            self.path, self.ttim_layer, self.ttim_name
-        )
-        self.set_defaults()
+    def copy_layers(self, dataset) -> None:
+        geopackage.copy_layer(dataset, self.timml_layer, self.timml_name)
+        geopackage.copy_layer(dataset, self.ttim_layer, self.ttim_name)
 
     def remove_from_geopackage(self):
         geopackage.remove_layer(self.path, self.timml_name)
@@ -399,11 +382,17 @@ class TransientElement(Element, abc.ABC):
         config = self.timml_layer.attributeTableConfig()
         columns = config.columns()
 
+        hidden = not transient
+        changed = False
         for i, column in enumerate(columns):
-            if column.name in self.transient_columns:
-                config.setColumnHidden(i, not transient)
-
-        self.timml_layer.setAttributeTableConfig(config)
+            if column.name in self.transient_columns and column.hidden != hidden:
+                config.setColumnHidden(i, hidden)
+                changed = True
+
+        # Setting the config emits signals and refreshes the attribute table:
+        # only do so when something has changed.
+        if changed:
+            self.timml_layer.setAttributeTableConfig(config)
         return
 
     @staticmethod
@@ -504,19 +493,11 @@ class AssociatedElement(Element, abc.ABC):
         )
 
     def assoc_layer_from_geopackage(self):
-        self.assoc_layer = QgsVectorLayer(
-            f"{self.path}|layername={self.assoc_name}",
-            self.assoc_name,
-        )
+        self.assoc_layer = geopackage.open_layer(self.path, self.assoc_name)
 
-    def write(self):
-        self.timml_layer = geopackage.write_layer(
-            self.path, self.timml_layer, self.timml_name
-        )
-        self.assoc_layer = geopackage.write_layer(
-            self.path, self.assoc_layer, self.assoc_name
-        )
-        self.set_defaults()
+    def copy_layers(self, dataset) -> None:
+        geopackage.copy_layer(dataset, self.timml_layer, self.timml_name)
+        geopackage.copy_layer(dataset, self.assoc_layer, self.assoc_name)
 
     def remove_from_geopackage(self):
         geopackage.remove_layer(self.path, self.timml_name)
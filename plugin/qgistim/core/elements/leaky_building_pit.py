@@ -58,7 +58,7 @@ class LeakyBuildingPit(AssociatedElement):
         QgsField("order", QVariant.Int),
         QgsField("ndegrees", QVariant.Int),
     )
-    assoc_attributes = [
+    assoc_attributes = (
         QgsField("inhomogeneity_id", QVariant.Int),
         QgsField("layer", QVariant.Int),
         QgsField("aquifer_top", QVariant.Double),
@@ -71,7 +71,7 @@ class LeakyBuildingPit(AssociatedElement):
         QgsField("wall_in_layer", QVariant.Bool),
         QgsField("aquitard_npor", QVariant.Double),
         QgsField("aquifer_npor", QVariant.Double),
-    ]
+    )
     timml_defaults = {
         "order": QgsDefaultValue("4"),
         "ndegrees": QgsDefaultValue("6"),
@@ -55,7 +55,7 @@ class PolygonInhomogeneity(AssociatedElement):
         QgsField("order", QVariant.Int),
         QgsField("ndegrees", QVariant.Int),
     )
-    assoc_attributes = [
+    assoc_attributes = (
         QgsField("inhomogeneity_id", QVariant.Int),
         QgsField("layer", QVariant.Int),
         QgsField("aquifer_top", QVariant.Double),
@@ -67,7 +67,7 @@ class PolygonInhomogeneity(AssociatedElement):
         QgsField("rate", QVariant.Double),
         QgsField("aquitard_npor", QVariant.Double),
         QgsField("aquifer_npor", QVariant.Double),
-    ]
+    )
     timml_defaults = {
         "order": QgsDefaultValue("4"),
         "ndegrees": QgsDefaultValue("6"),
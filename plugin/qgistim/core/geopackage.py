@@ -5,20 +5,74 @@ This module lightly wraps a few QGIS built in functions to:
 
     * List the layers of a geopackage
     * Write a layer to a geopackage
-    * Remove a layer from a geopackage
+    * Write multiple layers to a geopackage within a single transaction
+    * Remove a layer from a geopackage, directly with sqlite3
 
 """
+
+import importlib.util
 import sqlite3
 from contextlib import contextmanager
-from typing import List
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from osgeo import gdal, ogr, osr
+from PyQt5.QtCore import QDate, QDateTime, Qt, QVariant
+from qgis.core import NULL, QgsDataProvider, QgsVectorFileWriter, QgsVectorLayer
+
+# SQLite settings for the OGR dataset opened by write_transaction: the default
+# page cache (2 MB) is too small to build the spatial indexes of larger layers
+# in memory. Applied thread locally, so the GeoPackages opened by QGIS,
+# including the plugin's layers, are unaffected.
+SQLITE_CONFIG_OPTIONS = {"OGR_SQLITE_CACHE": "128"}
+
+# Options shared by every layer written with the QgsVectorFileWriter; copied
+# per call.
+GPKG_SAVE_OPTIONS = QgsVectorFileWriter.SaveVectorOptions()
+GPKG_SAVE_OPTIONS.driverName = "gpkg"
+# Build the spatial index as part of the write, so it need not be created
+# when the layer is first rendered.
+GPKG_SAVE_OPTIONS.layerOptions = ["SPATIAL_INDEX=YES"]
 
-from qgis import processing
-from qgis.core import QgsVectorFileWriter, QgsVectorLayer
+OGR_FIELD_TYPES = {
+    QVariant.Bool: ogr.OFTInteger,
+    QVariant.Int: ogr.OFTInteger,
+    QVariant.LongLong: ogr.OFTInteger64,
+    QVariant.Double: ogr.OFTReal,
+    QVariant.String: ogr.OFTString,
+    QVariant.Date: ogr.OFTDate,
+    QVariant.DateTime: ogr.OFTDateTime,
+}
 
 
 @contextmanager
-def sqlite3_cursor(path):
-    connection = sqlite3.connect(path)
+def config_options(**options):
+    """
+    Temporarily set GDAL config options for the current thread, restoring the
+    previous values afterwards.
+
+    Config options set with gdal.SetConfigOption apply to the whole QGIS
+    process; thread local options only affect the datasets opened by the
+    plugin on this thread.
+    """
+    previous = {key: gdal.GetThreadLocalConfigOption(key) for key in options}
+    for key, value in options.items():
+        gdal.SetThreadLocalConfigOption(key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            gdal.SetThreadLocalConfigOption(key, value)
+
+
+@contextmanager
+def sqlite3_cursor(path, read_only: bool = False):
+    if read_only:
+        connection = sqlite3.connect(
+            f"{Path(path).absolute().as_uri()}?mode=ro", uri=True
+        )
+    else:
+        connection = sqlite3.connect(path)
     cursor = connection.cursor()
     try:
         yield cursor
@@ -27,10 +81,69 @@ def sqlite3_cursor(path):
         connection.close()
 
 
+def file_state(path: str) -> Tuple[int, ...]:
+    """
+    Inode, change and modification time, and size of the file; empty if it
+    does not exist. In WAL mode, changes to a geopackage are written to the
+    -wal file first, so it is included as well.
+
+    The modification time alone does not suffice: on file systems with a
+    coarse resolution (FAT, SMB shares), a rewrite of the same size within one
+    tick would go unnoticed. A replaced file has a different inode.
+    """
+    state = []
+    for filepath in (Path(path), Path(f"{path}-wal")):
+        try:
+            stat = filepath.stat()
+        except FileNotFoundError:
+            continue
+        state.extend((stat.st_ino, stat.st_ctime_ns, stat.st_mtime_ns, stat.st_size))
+    return tuple(state)
+
+
+# Layer names per geopackage path, with the file state they were read for.
+_LAYERS_CACHE: Dict[str, Tuple[Tuple[int, ...], List[str]]] = {}
+
+
+def invalidate_layers_cache(path: str) -> None:
+    _LAYERS_CACHE.pop(str(path), None)
+
+
+def _read_layers(path: str) -> List[str]:
+    # Reading the gpkg_contents table directly avoids initializing GDAL. Only
+    # vector layers are relevant: skip tile (raster) tables.
+    #
+    # A read-only connection cannot open a GeoPackage in WAL mode when its
+    # -shm file does not exist and cannot be created: retry with a regular
+    # connection.
+    error = None
+    for read_only in (True, False):
+        try:
+            with sqlite3_cursor(path, read_only=read_only) as cursor:
+                cursor.execute(
+                    "Select table_name from gpkg_contents"
+                    " where data_type in ('features', 'attributes')"
+                )
+                return [item[0] for item in cursor.fetchall()]
+        except sqlite3.Error as e:
+            error = e
+
+    # Fall back on OGR if available: pyogrio is not shipped with every QGIS
+    # installation.
+    if importlib.util.find_spec("pyogrio") is None:
+        raise error
+
+    import pyogrio
+
+    return [str(name) for name, _ in pyogrio.list_layers(path)]
+
+
 def layers(path: str) -> List[str]:
     """
     Return all layers that are present in the geopackage.
 
+    The result is cached per path, until the file is modified.
+
     Parameters
     ----------
     path: str
@@ -40,10 +153,38 @@ def layers(path: str) -> List[str]:
     -------
     layernames: List[str]
     """
-    with sqlite3_cursor(path) as cursor:
-        cursor.execute("Select table_name from gpkg_contents")
-        layers = [item[0] for item in cursor.fetchall()]
-    return layers
+    path = str(path)
+    state = file_state(path)
+    cached = _LAYERS_CACHE.get(path)
+    if cached is not None and cached[0] == state:
+        return list(cached[1])
+
+    layernames = _read_layers(path)
+    _LAYERS_CACHE[path] = (state, layernames)
+    return list(layernames)
+
+
+def open_layer(path: str, layername: str) -> QgsVectorLayer:
+    """
+    Open a layer of the GeoPackage as a QgsVectorLayer.
+
+    The QGIS OGR provider shares a single GDAL dataset (and so a single SQLite
+    connection) between the layers of a file, provided they are opened with
+    the same URI options. Opening every layer through this function keeps the
+    URIs identical apart from the layer name.
+
+    Parameters
+    ----------
+    path: str
+        Path to the GeoPackage file
+    layername: str
+        Layer name in the GeoPackage
+
+    Returns
+    -------
+    layer: QgsVectorLayer
+    """
+    return QgsVectorLayer(f"{path}|layername={layername}", layername, "ogr")
 
 
 def write_layer(
@@ -69,26 +210,230 @@ def write_layer(
         The layer, now associated with the both GeoPackage and its QGIS
         representation.
     """
-    options = QgsVectorFileWriter.SaveVectorOptions()
-    options.driverName = "gpkg"
+    options = QgsVectorFileWriter.SaveVectorOptions(GPKG_SAVE_OPTIONS)
     options.layerName = layername
     if not newfile:
         options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
-    write_result, error_message = QgsVectorFileWriter.writeAsVectorFormat(
-        layer, path, options
+    write_result, error_message, _, _ = QgsVectorFileWriter.writeAsVectorFormatV3(
+        layer, path, layer.transformContext(), options
     )
+    invalidate_layers_cache(path)
     if write_result != QgsVectorFileWriter.NoError:
         raise RuntimeError(
             f"Layer {layername} could not be written to geopackage: {path}"
             f" with error: {error_message}"
         )
-    layer = QgsVectorLayer(f"{path}|layername={layername}", layername, "ogr")
+    # Point the written layer to the GeoPackage rather than constructing a
+    # second QgsVectorLayer.
+    layer.setDataSource(
+        f"{path}|layername={layername}",
+        layername,
+        "ogr",
+        QgsDataProvider.ProviderOptions(),
+    )
     return layer
 
 
-def remove_layer(path: str, layer: str) -> None:
-    query = {"DATABASE": f"{path}|layername={layer}", "SQL": f"drop table {layer}"}
+def write_transaction(
+    path: str, write: Callable[[ogr.DataSource], None], newfile: bool = False
+) -> None:
+    """
+    Open the GeoPackage once and wrap everything written to it in a single
+    transaction, so that SQLite only has to lock and sync the file once.
+
+    The dataset is closed before this function returns: the layers written
+    within the transaction can then be opened by QGIS, without an OGR update
+    handle remaining open on the same file.
+
+    Parameters
+    ----------
+    path: str
+        Path to the GeoPackage file
+    write: Callable[[ogr.DataSource], None]
+        Writes the layers to the open dataset, e.g. with ``copy_layer``.
+    newfile: bool, optional
+        Whether to create a new GeoPackage file. Defaults to false.
+    """
+    with config_options(**SQLITE_CONFIG_OPTIONS):
+        if newfile:
+            driver = ogr.GetDriverByName("GPKG")
+            if Path(path).exists():
+                driver.DeleteDataSource(path)
+            dataset = driver.CreateDataSource(path)
+        else:
+            dataset = ogr.Open(path, update=1)
+    if dataset is None:
+        raise RuntimeError(f"Could not open geopackage: {path}")
+
+    dataset.StartTransaction()
     try:
-        processing.run("native:spatialiteexecutesql", query)
+        write(dataset)
     except Exception:
-        raise RuntimeError(f"Failed to remove layer with {query}")
+        dataset.RollbackTransaction()
+        raise
+    else:
+        dataset.CommitTransaction()
+    finally:
+        # This is the only reference to the dataset, as it is not handed out
+        # beyond write: dereferencing it closes the file.
+        dataset = None
+        invalidate_layers_cache(path)
+    return
+
+
+def _ogr_value(value):
+    if isinstance(value, (QDate, QDateTime)):
+        return value.toString(Qt.ISODate)
+    return value
+
+
+def create_spatial_index(dataset, layername: str) -> None:
+    """
+    Build the RTree spatial index of a layer in a single pass.
+
+    Parameters
+    ----------
+    dataset: ogr.DataSource
+    layername: str
+    """
+    ogr_layer = dataset.GetLayerByName(layername)
+    geometry_column = ogr_layer.GetGeometryColumn()
+    table = layername.replace("'", "''")
+    result = dataset.ExecuteSQL(
+        f"SELECT CreateSpatialIndex('{table}', '{geometry_column}')"
+    )
+    dataset.ReleaseResultSet(result)
+    return
+
+
+def copy_layer(
+    dataset, layer: QgsVectorLayer, layername: str, spatial_index: bool = True
+) -> None:
+    """
+    Copies a (2D, in-memory) QgsVectorLayer into an open GeoPackage dataset,
+    overwriting a layer with the same name if present.
+
+    The layer is created without a spatial index: the index is built once
+    after all features have been inserted, rather than updated per feature.
+
+    Parameters
+    ----------
+    dataset: ogr.DataSource
+        As provided by ``write_transaction``.
+    layer: QgsVectorLayer
+        QGIS map layer (in-memory)
+    layername: str
+        Layer name to write in the GeoPackage
+    spatial_index: bool, optional
+        Whether to build a spatial index. Ignored for layers without geometry.
+        Defaults to true.
+    """
+    # The QgsWkbTypes values of the 2D geometry types and of NoGeometry match
+    # the OGR wkbGeometryType values.
+    geometry_type = int(layer.wkbType())
+    if geometry_type == ogr.wkbNone:
+        srs = None
+    else:
+        srs = osr.SpatialReference()
+        srs.ImportFromWkt(layer.crs().toWkt())
+
+    ogr_layer = dataset.CreateLayer(
+        layername, srs, geometry_type, options=["OVERWRITE=YES", "SPATIAL_INDEX=NO"]
+    )
+    if ogr_layer is None:
+        raise RuntimeError(f"Layer {layername} could not be created in geopackage")
+
+    fields = layer.fields()
+    for field in fields:
+        field_type = OGR_FIELD_TYPES.get(field.type())
+        if field_type is None:
+            raise ValueError(
+                f"Field {field.name()} of layer {layername} has an unsupported"
+                f" type: {field.typeName()}"
+            )
+        field_definition = ogr.FieldDefn(field.name(), field_type)
+        if field.type() == QVariant.Bool:
+            field_definition.SetSubType(ogr.OFSTBoolean)
+        # A length or precision of zero (or less) means: not specified.
+        if field.length() > 0:
+            field_definition.SetWidth(field.length())
+        if field.precision() > 0:
+            field_definition.SetPrecision(field.precision())
+        ogr_layer.CreateField(field_definition)
+
+    definition = ogr_layer.GetLayerDefn()
+    for feature in layer.getFeatures():
+        ogr_feature = ogr.Feature(definition)
+        for i, value in enumerate(feature.attributes()):
+            if value == NULL or value is None:
+                ogr_feature.SetFieldNull(i)
+            else:
+                ogr_feature.SetField(i, _ogr_value(value))
+        geometry = feature.geometry()
+        if not geometry.isNull():
+            ogr_feature.SetGeometry(ogr.CreateGeometryFromWkb(bytes(geometry.asWkb())))
+        ogr_layer.CreateFeature(ogr_feature)
+
+    if spatial_index and geometry_type != ogr.wkbNone:
+        create_spatial_index(dataset, layername)
+    return
+
+
+def quote_identifier(identifier: str) -> str:
+    """Quote a (table) name for use in an SQL statement."""
+    escaped = identifier.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def remove_layer(path: str, layer: str) -> None:
+    """
+    Remove a layer from the geopackage, including its RTree spatial index
+    and its entries in the GeoPackage metadata tables, in a single
+    transaction.
+
+    Parameters
+    ----------
+    path: str
+        Path to the geopackage
+    layer: str
+        Name of the layer to remove
+    """
+    with sqlite3_cursor(path) as cursor:
+        # Manage the transaction explicitly: by default, the sqlite3 module
+        # does not open a transaction for DROP statements.
+        cursor.connection.isolation_level = None
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute(
+                "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?",
+                (layer,),
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                rtree = quote_identifier(f"rtree_{layer}_{row[0]}")
+                cursor.execute(f"DROP TABLE IF EXISTS {rtree}")
+            cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(layer)}")
+
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            tables = {item[0] for item in cursor.fetchall()}
+            # The optional tables only exist if some layer uses them.
+            # gpkg_contents goes last: the others refer to it.
+            for table in (
+                "gpkg_geometry_columns",
+                "gpkg_extensions",
+                "gpkg_ogr_contents",
+                "gpkg_data_columns",
+                "gpkg_metadata_reference",
+                "gpkg_contents",
+            ):
+                if table in tables:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE table_name = ?", (layer,)
+                    )
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            cursor.execute("ROLLBACK")
+            raise RuntimeError(f"Failed to remove layer {layer} from {path}") from e
+        finally:
+            invalidate_layers_cache(path)
+    return
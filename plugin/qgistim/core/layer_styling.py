@@ -5,10 +5,13 @@ We'd like contours to look the same consistently. A Domain should be
 transparent, not obscuring the view. A head grid should have pseudocoloring,
 ideally with a legend stretching from minimum to maximum.
 """
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+from osgeo import gdal
 from PyQt5.QtGui import QColor
 from qgis.core import (
+    QgsColorRamp,
     QgsColorRampShader,
     QgsLineSymbol,
     QgsPalLayerSettings,
@@ -22,6 +25,62 @@ from qgis.core import (
     QgsVectorLayerSimpleLabeling,
 )
 
+CONTOUR_SYMBOL = QgsLineSymbol.createSimple(
+    {
+        "color": "#000000",  # black
+        "width": "0.25",
+    }
+)
+
+# Color ramps of the default style, by name. Cleared when the default style's
+# ramps are modified.
+_COLOR_RAMPS = {}
+# Colors of the evenly spaced classes, by colormap name and number of classes.
+_RAMP_COLORS = {}
+_COLOR_RAMP_SIGNALS_CONNECTED = False
+
+
+def _clear_color_ramps(*_) -> None:
+    _COLOR_RAMPS.clear()
+    _RAMP_COLORS.clear()
+
+
+def default_color_ramp(colormap: str) -> QgsColorRamp:
+    """
+    Return a copy of a color ramp of the default QGIS style.
+
+    Looking up a ramp in the default style clones it; cache the ramps per name
+    instead and hand out copies, since color ramps are mutable.
+    """
+    global _COLOR_RAMP_SIGNALS_CONNECTED
+    style = QgsStyle.defaultStyle()
+    if not _COLOR_RAMP_SIGNALS_CONNECTED:
+        style.rampChanged.connect(_clear_color_ramps)
+        style.rampRemoved.connect(_clear_color_ramps)
+        style.rampRenamed.connect(_clear_color_ramps)
+        _COLOR_RAMP_SIGNALS_CONNECTED = True
+
+    ramp = _COLOR_RAMPS.get(colormap)
+    if ramp is None:
+        ramp = style.colorRamp(colormap)
+        _COLOR_RAMPS[colormap] = ramp
+    return ramp.clone()
+
+
+def ramp_colors(colormap: str, ramp: QgsColorRamp, nclass: int) -> List[QColor]:
+    """
+    Return the colors of nclass + 1 evenly spaced fractions of the ramp.
+
+    These only depend on the colormap and number of classes, not on the data:
+    they are computed once and reused for every subsequent renderer.
+    """
+    key = (colormap, nclass)
+    colors = _RAMP_COLORS.get(key)
+    if colors is None:
+        colors = [ramp.color(f) for f in np.linspace(0.0, 1.0, nclass + 1).tolist()]
+        _RAMP_COLORS[key] = colors
+    return colors
+
 
 def color_ramp_items(
     colormap: str, minimum: float, maximum: float, nclass: int
@@ -41,19 +100,83 @@ def color_ramp_items(
     color_ramp_items: List[QgsColorRampShader.ColorRampItem]
         Can be used directly by the QgsColorRampShader
     """
-    delta = maximum - minimum
-    fractional_steps = [i / nclass for i in range(nclass + 1)]
-    ramp = QgsStyle().defaultStyle().colorRamp(colormap)
-    colors = [ramp.color(f) for f in fractional_steps]
-    steps = [minimum + f * delta for f in fractional_steps]
+    # Convert to Python floats once: Qt does not accept numpy floats.
+    steps = np.linspace(minimum, maximum, nclass + 1).tolist()
+    ramp = default_color_ramp(colormap)
+    colors = ramp_colors(colormap, ramp, nclass)
     return ramp, [
         QgsColorRampShader.ColorRampItem(step, color, str(step))
         for step, color in zip(steps, colors)
     ]
 
 
+def steady_or_first_bands(path: str) -> List[int]:
+    """
+    Return the numbers of the bands to display of a head raster: every band
+    of steady-state output, and the first time step of every layer of
+    transient output.
+
+    Only the band metadata is read, with GDAL.
+
+    Parameters
+    ----------
+    path: str
+        Path to the raster file.
+
+    Returns
+    -------
+    bands: List[int]
+    """
+    dataset = gdal.Open(str(path), gdal.GA_ReadOnly)
+    if dataset is None:
+        raise RuntimeError(f"Could not open raster: {path}")
+    bands = []
+    for band in range(1, dataset.RasterCount + 1):
+        time = dataset.GetRasterBand(band).GetMetadataItem("NETCDF_DIM_time")
+        if time is None or float(time) == 0.0:
+            bands.append(band)
+    dataset = None
+    return bands
+
+
+def raster_extremes(path: str, bands: List[int]) -> Dict[int, Tuple[float, float]]:
+    """
+    Compute the minimum and maximum of bands of a raster with GDAL.
+
+    This does not involve QGIS, so it can run in a QgsTask on a worker thread.
+
+    Parameters
+    ----------
+    path: str
+        Path to the raster file.
+    bands: List[int]
+        Numbers of the bands to compute the extremes for.
+
+    Returns
+    -------
+    extremes: Dict[int, Tuple[float, float]]
+        Minimum and maximum per band number.
+    """
+    dataset = gdal.Open(str(path), gdal.GA_ReadOnly)
+    if dataset is None:
+        raise RuntimeError(f"Could not open raster: {path}")
+    extremes = {}
+    for band in bands:
+        # approx_ok=False: compute exactly, do not sample.
+        minmax = dataset.GetRasterBand(band).ComputeRasterMinMax(False)
+        # E.g. a band with only nodata values has no extremes.
+        if minmax is not None:
+            extremes[band] = tuple(minmax)
+    dataset = None
+    return extremes
+
+
 def pseudocolor_renderer(
-    layer, band: int, colormap: str, nclass: int
+    layer,
+    band: int,
+    colormap: str,
+    nclass: int,
+    extremes: Optional[Tuple[float, float]] = None,
 ) -> QgsSingleBandPseudoColorRenderer:
     """
     Parameters
@@ -65,14 +188,25 @@ def pseudocolor_renderer(
         Name of QGIS colormap
     nclass: int
         Number of colormap classes to create
+    extremes: Tuple[float, float], optional
+        Minimum and maximum of the band, if already known. Otherwise, they are
+        computed from the layer.
 
     Returns
     -------
     renderer: QgsSingleBandPseudoColorRenderer
     """
-    stats = layer.dataProvider().bandStatistics(band, QgsRasterBandStats.All)
-    minimum = stats.minimumValue
-    maximum = stats.maximumValue
+    provider = layer.dataProvider()
+    if extremes is None:
+        # Only the extremes are needed. Do not sample: the head is often
+        # steepest near wells, and sampling would miss the peaks.
+        stats = provider.bandStatistics(
+            band, QgsRasterBandStats.Min | QgsRasterBandStats.Max
+        )
+        minimum = stats.minimumValue
+        maximum = stats.maximumValue
+    else:
+        minimum, maximum = extremes
 
     ramp, ramp_items = color_ramp_items(colormap, minimum, maximum, nclass)
     shader_function = QgsColorRampShader()
@@ -86,17 +220,11 @@ def pseudocolor_renderer(
     raster_shader = QgsRasterShader()
     raster_shader.setRasterShaderFunction(shader_function)
 
-    return QgsSingleBandPseudoColorRenderer(layer.dataProvider(), band, raster_shader)
+    return QgsSingleBandPseudoColorRenderer(provider, band, raster_shader)
 
 
 def contour_renderer() -> QgsSingleSymbolRenderer:
-    symbol = QgsLineSymbol.createSimple(
-        {
-            "color": "#000000#",  # black
-            "width": "0.25",
-        }
-    )
-    return QgsSingleSymbolRenderer(symbol)
+    return QgsSingleSymbolRenderer(CONTOUR_SYMBOL.clone())
 
 
 def number_labels(field: str) -> QgsVectorLayerSimpleLabeling:
@@ -58,12 +58,19 @@ class ServerHandler:
         Starts a new PyInstaller interpreter.
         """
         interpreter = self.get_interpreter()
+        # Communication runs via the pipes: on Windows, do not allocate a
+        # console window for the server.
+        if platform.system() == "Windows":
+            creationflags = subprocess.CREATE_NO_WINDOW
+        else:
+            creationflags = 0
         self.process = subprocess.Popen(
             [interpreter, "serve"],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
+            creationflags=creationflags,
         )
         response = json.loads(self.process.stdout.readline())
         return response
@@ -83,8 +90,7 @@ class ServerHandler:
         received: str
             Value depends on the requested operation
         """
-        self.process.stdin.write(json.dumps(data))
-        self.process.stdin.write("\n")
+        self.process.stdin.write(f"{json.dumps(data)}\n")
         self.process.stdin.flush()
         response = json.loads(self.process.stdout.readline())
         return response
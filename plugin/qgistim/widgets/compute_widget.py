@@ -1,6 +1,8 @@
 import datetime
+import hashlib
+import os
 from pathlib import Path
-from typing import NamedTuple, Tuple, Union
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
@@ -16,6 +18,7 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 from qgis.core import (
+    Qgis,
     QgsApplication,
     QgsMapLayerProxyModel,
     QgsMeshDatasetIndex,
@@ -35,6 +38,21 @@ from qgistim.core.processing import (
 )
 from qgistim.core.task import BaseServerTask
 
+# The field to label the vector output with, by tim type and element type.
+LABEL_FIELDS = {
+    ("timml", "Head Observation"): "head_layer0",
+    ("ttim", "Head Observation"): "head_layer0",
+    ("timml", "Discharge Observation"): "discharge_layer0",
+}
+
+
+def normalized_path(path: Union[Path, str]) -> str:
+    """
+    Normalize a path for comparison with the source of a map layer, without
+    constructing a Path object for every layer in the project.
+    """
+    return os.path.normcase(os.path.normpath(path))
+
 
 class OutputOptions(NamedTuple):
     raster: bool
@@ -46,6 +64,14 @@ class OutputOptions(NamedTuple):
     spacing: float
 
 
+class Computed(NamedTuple):
+    input_digest: str
+    transient: bool
+    output_state: Tuple[Tuple[int, ...], ...]
+    raster_bands: Optional[List[int]]
+    raster_extremes: Optional[Dict[int, Tuple[float, float]]]
+
+
 class ComputeTask(BaseServerTask):
     @property
     def task_description(self):
@@ -53,7 +79,23 @@ class ComputeTask(BaseServerTask):
 
     def run(self):
         self.starttime = datetime.datetime.now()
-        return super().run()
+        self.raster_bands = None
+        self.raster_extremes = None
+        result = super().run()
+        # Scan the head grid here, off the GUI thread, rather than while
+        # styling the raster layers.
+        if result and self.data["output_options"].raster:
+            raster_path = Path(self.data["path"]).with_suffix(".nc")
+            try:
+                # Only the bands that are displayed.
+                self.raster_bands = layer_styling.steady_or_first_bands(raster_path)
+                self.raster_extremes = layer_styling.raster_extremes(
+                    raster_path, self.raster_bands
+                )
+            except RuntimeError:
+                # Leave it to QGIS to compute the statistics.
+                pass
+        return result
 
     def success_message(self):
         runtime = datetime.datetime.now() - self.starttime
@@ -69,21 +111,19 @@ class ComputeTask(BaseServerTask):
         if result:
             self.push_success_message()
             path = self.data["path"]
-            output = self.data["output_options"]
-            name = f"{Path(path).stem}"
-            self.parent.parent.create_output_group(name=f"{name} output")
-            if any(
-                (
-                    output.head_observations,
-                    output.discharge,
-                    output.discharge_observations,
-                )
-            ):
-                self.parent.load_vector_result(path)
-            if output.mesh:
-                self.parent.load_mesh_result(path, output.contours)
-            if output.raster:
-                self.parent.load_raster_result(path)
+            self.parent.load_result(
+                path,
+                self.data["output_options"],
+                self.raster_bands,
+                self.raster_extremes,
+            )
+            self.parent.computed[path] = Computed(
+                self.input_digest,
+                self.data["transient"],
+                self.parent.output_state(path),
+                self.raster_bands,
+                self.raster_extremes,
+            )
 
         else:
             self.push_failure_message()
@@ -96,6 +136,10 @@ class ComputeWidget(QWidget):
         self.compute_task = None
         self.start_task = None
         self.parent = parent
+        # Per JSON input path: the digest of the input, whether it was
+        # transient, the state of the output files after computing, and the
+        # displayed bands of the head raster with their extremes.
+        self.computed = {}
 
         self.domain_button = QPushButton("Set to current extent")
         self.compute_button = QPushButton("Compute")
@@ -115,9 +159,7 @@ class ComputeWidget(QWidget):
         self.domain_button.clicked.connect(self.domain)
         # By default: all output
         self.mesh_checkbox.toggled.connect(self.contours_checkbox.setEnabled)
-        self.mesh_checkbox.toggled.connect(
-            lambda checked: not checked and self.contours_checkbox.setChecked(False)
-        )
+        self.mesh_checkbox.toggled.connect(self.on_mesh_toggled)
 
         # self.mesh_checkbox = QCheckBox("Trimesh")
         self.output_line_edit = QLineEdit()
@@ -215,6 +257,11 @@ class ComputeWidget(QWidget):
         self.compute_button.setEnabled(False)
         return
 
+    def on_mesh_toggled(self, checked: bool) -> None:
+        # Contours are generated from the mesh output.
+        if not checked:
+            self.contours_checkbox.setChecked(False)
+
     def set_minimum_contour_stop(self) -> None:
         self.contour_max_box.setMinimum(self.contour_min_box.value() + 0.05)
 
@@ -259,13 +306,16 @@ class ComputeWidget(QWidget):
 
     def clear_outdated_output(self, path: str) -> None:
         path = Path(path)
-        gpkg_path = path.with_suffix(".output.gpkg")
-        netcdf_paths = (path.with_suffix(".nc"), path.with_suffix(".ugrid.nc"))
+        gpkg_path = normalized_path(path.with_suffix(".output.gpkg"))
+        netcdf_paths = (
+            normalized_path(path.with_suffix(".nc")),
+            normalized_path(path.with_suffix(".ugrid.nc")),
+        )
         for layer in QgsProject.instance().mapLayers().values():
             source = layer.source()
             if (
-                Path(source) in netcdf_paths
-                or Path(source.partition("|")[0]) == gpkg_path
+                normalized_path(source) in netcdf_paths
+                or normalized_path(source.partition("|")[0]) == gpkg_path
             ):
                 QgsProject.instance().removeMapLayer(layer.id())
         return
@@ -311,16 +361,11 @@ class ComputeWidget(QWidget):
             )
 
         # Re-use layer if it already exists. Otherwise add a new layer.
-        project_layers = {
-            layer.name(): layer for layer in QgsProject.instance().mapLayers().values()
-        }
-        project_layer = project_layers.get(contours_name)
-        if (
-            (project_layer is not None)
-            and (project_layer.name() == layer.name())
-            and (project_layer.source() == layer.source())
-        ):
-            project_layer.reload()
+        source = layer.source()
+        for project_layer in QgsProject.instance().mapLayersByName(contours_name):
+            if project_layer.source() == source:
+                project_layer.reload()
+                break
         else:
             self.add_contour_layer(layer)
         return
@@ -362,6 +407,32 @@ class ComputeWidget(QWidget):
         if invalid_input:
             return
 
+        # Skip the computation if neither the input nor the output has changed
+        # since the last one: just load the output again.
+        input_digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        key = str(path)
+        computed = self.computed.get(key)
+        if computed is not None and (
+            computed.input_digest,
+            computed.transient,
+            computed.output_state,
+        ) == (input_digest, transient, self.output_state(key)):
+            self.parent.message_bar.pushMessage(
+                title="Info",
+                text=f"Input unchanged, loaded the existing output of: {path}",
+                level=Qgis.Info,
+            )
+            self.load_result(
+                key,
+                self.output_options,
+                computed.raster_bands,
+                computed.raster_extremes,
+            )
+            # Loading the output may (re)write the contours.
+            self.computed[key] = computed._replace(output_state=self.output_state(key))
+            return
+        self.computed.pop(key, None)
+
         task_data = {
             "operation": "compute",
             "path": str(path),
@@ -377,12 +448,18 @@ class ComputeWidget(QWidget):
         # task.finished(result)
 
         # Remove the output layers from QGIS, otherwise they cannot be overwritten.
-        gpkg_path = str(path)
-        for layer in QgsProject.instance().mapLayers().values():
-            if Path(gpkg_path) == Path(layer.source()):
-                QgsProject.instance().removeMapLayer(layer.id())
+        target = normalized_path(path)
+        project = QgsProject.instance()
+        project.removeMapLayers(
+            [
+                layer_id
+                for layer_id, layer in project.mapLayers().items()
+                if normalized_path(layer.source()) == target
+            ]
+        )
 
         self.compute_task = ComputeTask(self, task_data, self.parent.message_bar)
+        self.compute_task.input_digest = input_digest
         self.start_task = self.parent.start_interpreter_task()
         if self.start_task is not None:
             self.compute_task.addSubTask(
@@ -416,6 +493,37 @@ class ComputeWidget(QWidget):
         self.spacing_spin_box.setValue(dy)
         return
 
+    @staticmethod
+    def output_state(path: Union[Path, str]) -> Tuple[Tuple[int, ...], ...]:
+        path = Path(path)
+        return tuple(
+            geopackage.file_state(str(path.with_suffix(suffix)))
+            for suffix in (".nc", ".ugrid.nc", ".output.gpkg")
+        )
+
+    def load_result(
+        self,
+        path: Union[Path, str],
+        output: OutputOptions,
+        raster_bands: Optional[List[int]] = None,
+        raster_extremes: Optional[Dict[int, Tuple[float, float]]] = None,
+    ) -> None:
+        name = f"{Path(path).stem}"
+        self.parent.create_output_group(name=f"{name} output")
+        if any(
+            (
+                output.head_observations,
+                output.discharge,
+                output.discharge_observations,
+            )
+        ):
+            self.load_vector_result(path)
+        if output.mesh:
+            self.load_mesh_result(path, output.contours)
+        if output.raster:
+            self.load_raster_result(path, raster_bands, raster_extremes)
+        return
+
     def load_mesh_result(self, path: Union[Path, str], load_contours: bool) -> None:
         path = Path(path)
         # String for QGIS functions
@@ -466,31 +574,37 @@ class ComputeWidget(QWidget):
 
         return
 
-    def load_raster_result(self, path: Union[Path, str]) -> None:
-        def steady_or_first(name: str) -> bool:
-            if "time=" not in name:
-                return True
-            elif "time=0" in name:
-                return True
-            return False
-
+    def load_raster_result(
+        self,
+        path: Union[Path, str],
+        bands: Optional[List[int]] = None,
+        extremes: Optional[Dict[int, Tuple[float, float]]] = None,
+    ) -> None:
         # String for QGIS functions
         path = Path(path)
         raster_path = str(path.with_suffix(".nc"))
-        layer = QgsRasterLayer(raster_path, "", "gdal")
-
-        bands = [i + 1 for i in range(layer.bandCount())]
-        bandnames = [layer.bandName(band) for band in bands]
-        bands = [band for band, name in zip(bands, bandnames) if steady_or_first(name)]
-
+        if bands is None:
+            try:
+                bands = layer_styling.steady_or_first_bands(raster_path)
+            except RuntimeError:
+                # E.g. the raster output is missing: there is nothing to add.
+                return
+
+        layers = []
         for i, band in enumerate(bands):
-            layer = QgsRasterLayer(raster_path, f"{path.stem}-head_layer_{i}", "gdal")
+            name = f"{path.stem}-head_layer_{i}"
+            layer = QgsRasterLayer(raster_path, name, "gdal")
             renderer = layer_styling.pseudocolor_renderer(
-                layer, band=band, colormap="Plasma", nclass=10
+                layer,
+                band=band,
+                colormap="Plasma",
+                nclass=10,
+                extremes=None if extremes is None else extremes.get(band),
             )
             layer.setRenderer(renderer)
-            self.parent.output_group.add_layer(layer, "raster")
+            layers.append({"layer": layer, "destination": "raster"})
 
+        self.parent.output_group.add_layers(layers)
         return
 
     def load_vector_result(self, path: Union[Path, str]) -> None:
@@ -500,6 +614,7 @@ class ComputeWidget(QWidget):
         if not gpkg_path.exists():
             return
 
+        layers = []
         for layername in geopackage.layers(str(gpkg_path)):
             layers_panel_name = f"{path.stem}-{layername}"
 
@@ -510,22 +625,25 @@ class ComputeWidget(QWidget):
             set_temporal_properties(layer)
 
             # Special-case the labelling for observations and discharge.
-            if (
-                "timml Head Observation:" in layername
-                or "ttim Head Observation" in layername
-            ):
-                labels = layer_styling.number_labels("head_layer0")
-            elif "timml Discharge Observation:" in layername:
-                labels = layer_styling.number_labels("discharge_layer0")
-            elif "discharge-" in layername:
-                labels = layer_styling.number_labels("discharge_layer0")
+            tim_type, element_type, _ = parse_name(layername)
+            if layername.startswith("discharge-"):
+                label_field = "discharge_layer0"
             else:
+                label_field = LABEL_FIELDS.get((tim_type, element_type))
+            if label_field is None:
                 labels = None
+            else:
+                labels = layer_styling.number_labels(label_field)
 
-            _, element_type, _ = parse_name(layername)
             renderer = ELEMENTS[element_type].renderer()
-            self.parent.output_group.add_layer(
-                layer, "vector", renderer=renderer, labels=labels
+            layers.append(
+                {
+                    "layer": layer,
+                    "destination": "vector",
+                    "renderer": renderer,
+                    "labels": labels,
+                }
             )
 
+        self.parent.output_group.add_layers(layers)
         return
@@ -33,7 +33,8 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from qgis.core import Qgis, QgsProject, QgsUnitTypes
+from qgis.core import Qgis, QgsProject, QgsSettings, QgsUnitTypes
+from qgistim.core import geopackage
 from qgistim.core.elements import Aquifer, Domain, load_elements_from_geopackage
 from qgistim.core.formatting import data_to_json, data_to_script
 from qgistim.widgets.compute_widget import OutputOptions
@@ -55,6 +56,24 @@ SUPPORTED_TTIM_ELEMENTS = set(
         "Head Observation",
     ]
 )
+LAST_DIRECTORY_KEY = "qgistim/last_directory"
+
+
+def select_geopackage(parent, save: bool) -> str:
+    """
+    Ask the user for a GeoPackage path, starting in the directory of the
+    previously selected GeoPackage rather than the current working directory.
+    """
+    settings = QgsSettings()
+    directory = settings.value(LAST_DIRECTORY_KEY, "", type=str)
+    if save:
+        get_filename = QFileDialog.getSaveFileName
+    else:
+        get_filename = QFileDialog.getOpenFileName
+    path, _ = get_filename(parent, "Select file", directory, "*.gpkg")
+    if path != "":  # Empty string in case of cancel button press
+        settings.setValue(LAST_DIRECTORY_KEY, str(Path(path).parent))
+    return path
 
 
 class Extraction(NamedTuple):
@@ -103,18 +122,30 @@ class DatasetTreeWidget(QTreeWidget):
         return item
 
     def add_element(self, element) -> None:
-        # These are mandatory elements, cannot be unticked
-        if isinstance(element, (Domain, Aquifer)):
-            enabled = False
-        else:
-            enabled = True
-
+        # Mandatory elements cannot be unticked
         item = self.add_item(
-            timml_name=element.timml_name, ttim_name=element.ttim_name, enabled=enabled
+            timml_name=element.timml_name,
+            ttim_name=element.ttim_name,
+            enabled=not element.mandatory,
         )
         item.element = element
         return
 
+    def add_elements(self, elements) -> None:
+        """
+        Add multiple elements at once. Repainting and sorting are suspended
+        until all items have been added.
+        """
+        self.setUpdatesEnabled(False)
+        self.setSortingEnabled(False)
+        try:
+            for element in elements:
+                self.add_element(element)
+        finally:
+            self.setSortingEnabled(True)
+            self.setUpdatesEnabled(True)
+        return
+
     def on_transient_changed(self, transient: bool) -> None:
         """
         Disable elements that are not supported by TTim, such as
@@ -123,9 +154,7 @@ class DatasetTreeWidget(QTreeWidget):
         self.setColumnHidden(2, not transient)
         # Disable unsupported ttim items, such as inhomogeneities
         for item in self.items():
-            prefix, _ = item.text(1).split(":")
-            _, elementtype = prefix.split("timml ")
-            if elementtype not in SUPPORTED_TTIM_ELEMENTS:
+            if item.element.element_type not in SUPPORTED_TTIM_ELEMENTS:
                 item.timml_checkbox.setChecked(not transient)
                 item.timml_checkbox.setEnabled(not transient)
 
@@ -145,11 +174,7 @@ class DatasetTreeWidget(QTreeWidget):
 
         # Collect the selected items
         selection = self.selectedItems()
-        selection = [
-            item
-            for item in selection
-            if not isinstance(item.element, (Aquifer, Domain))
-        ]
+        selection = [item for item in selection if not item.element.mandatory]
         # Append associated items
         for item in selection:
             if item.assoc_item is not None and item.assoc_item not in selection:
@@ -352,21 +377,35 @@ class DatasetWidget(QWidget):
         self.dataset_tree.reset()
         return
 
-    def add_item_to_qgis(self, item) -> None:
+    def add_items_to_qgis(self, items) -> None:
         # Get all the relevant data.
-        element = item.element
-        element.load_layers_from_geopackage()
         suppress = self.suppress_popup_checkbox.isChecked()
-        # Start adding the layers
-        maplayer = self.parent.input_group.add_layer(
-            element.timml_layer, "timml", element.renderer(), suppress
-        )
-        self.parent.input_group.add_layer(element.ttim_layer, "ttim")
-        self.parent.input_group.add_layer(element.assoc_layer, "timml")
-        # Set cell size if the item is a domain layer
-        if item.element.timml_name.split(":")[0] == "timml Domain":
+        layers = []
+        for item in items:
+            element = item.element
+            element.load_layers_from_geopackage()
+            layers.extend(
+                (
+                    {
+                        "layer": element.timml_layer,
+                        "destination": "timml",
+                        "renderer": element.renderer(),
+                        "suppress": suppress,
+                    },
+                    {"layer": element.ttim_layer, "destination": "ttim"},
+                    {"layer": element.assoc_layer, "destination": "timml"},
+                )
+            )
+        # Add the layers in one go.
+        self.parent.input_group.add_layers(layers)
+        # Set cell size if one of the items is a domain layer
+        for item in items:
+            element = item.element
+            if not isinstance(element, Domain):
+                continue
+            maplayer = element.timml_layer
             if maplayer.featureCount() <= 0:
-                return
+                continue
             feature = next(iter(maplayer.getFeatures()))
             extent = feature.geometry().boundingBox()
             ymax = extent.yMaximum()
@@ -375,9 +414,7 @@ class DatasetWidget(QWidget):
         return
 
     def add_selection_to_qgis(self) -> None:
-        selection = self.dataset_tree.selectedItems()
-        for item in selection:
-            self.add_item_to_qgis(item)
+        self.add_items_to_qgis(self.dataset_tree.selectedItems())
         return
 
     def load_geopackage(self, input_group: str = None) -> None:
@@ -392,16 +429,13 @@ class DatasetWidget(QWidget):
         self.parent.create_input_group(input_group)
 
         elements = load_elements_from_geopackage(self.path)
-        for element in elements:
-            self.dataset_tree.add_element(element)
+        self.dataset_tree.add_elements(elements)
 
-        transient = self.transient
-        for item in self.dataset_tree.items():
-            self.add_item_to_qgis(item)
-            item.element.on_transient_changed(transient)
+        self.add_items_to_qgis(self.dataset_tree.items())
 
         self.dataset_tree.sortByColumn(0, Qt.SortOrder.AscendingOrder)
         self.parent.enable_geopackage_buttons()
+        # This also sets the transient columns of every element.
         self.on_transient_changed()
         self.model_crs = self.domain_item().element.timml_layer.crs()
         self.parent.qgs_project.writeEntry("qgistim", "geopackage_path", self.path)
@@ -426,14 +460,20 @@ class DatasetWidget(QWidget):
             self.parent.message_bar.pushMessage("Error", msg, level=Qgis.Critical)
             return
 
-        path, _ = QFileDialog.getSaveFileName(self, "Select file", "", "*.gpkg")
+        path = select_geopackage(self, save=True)
         if path != "":  # Empty string in case of cancel button press
             self.dataset_line_edit.setText(path)
-            # Writing here creates a new Geopackage.
-            for element in (Aquifer, Domain):
-                instance = element(self.path, "")
+            # Writing here creates a new Geopackage. Write the layers of both
+            # elements in a single transaction.
+            instances = [element(self.path, "") for element in (Aquifer, Domain)]
+            for instance in instances:
                 instance.create_layers(crs)
-                instance.write()
+
+            def write(dataset) -> None:
+                for instance in instances:
+                    instance.copy_layers(dataset)
+
+            geopackage.write_transaction(self.path, write, newfile=True)
             # Next, we load the newly written layers.
             self.load_geopackage()
 
@@ -443,9 +483,11 @@ class DatasetWidget(QWidget):
         """
         Open a GeoPackage file, containing qgis-tim
         """
-        path, _ = QFileDialog.getOpenFileName(self, "Select file", "", "*.gpkg")
+        path = select_geopackage(self, save=False)
         if path != "":  # Empty string in case of cancel button press
             self.dataset_line_edit.setText(path)
+            # The file may have been modified outside of the plugin.
+            geopackage.invalidate_layers_cache(path)
             try:
                 self.load_geopackage()
             except:  # noqa: E722
@@ -461,7 +503,7 @@ class DatasetWidget(QWidget):
         # Do nothing if there's nothing to copy.
         if self.path == "":
             return
-        target_path, _ = QFileDialog.getSaveFileName(self, "Select file", "", "*.gpkg")
+        target_path = select_geopackage(self, save=True)
         if target_path != "":  # Empty string in case of cancel button press
             source_path = Path(self.path)
             target_path = Path(target_path)
@@ -11,8 +11,8 @@ class ElementsWidget(QWidget):
         self.parent = parent
 
         self.element_buttons = {}
-        for element in ELEMENTS:
-            if element in ("Aquifer", "Domain"):
+        for element, klass in ELEMENTS.items():
+            if klass.mandatory:
                 continue
             button = QPushButton(element)
             button.clicked.connect(partial(self.tim_element, element_type=element))
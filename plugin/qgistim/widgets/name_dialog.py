@@ -0,0 +1,29 @@
+from PyQt5.QtWidgets import (
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QVBoxLayout,
+)
+
+
+class NameDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.name_line_edit = QLineEdit()
+        self.ok_button = QPushButton("OK")
+        self.cancel_button = QPushButton("Cancel")
+        self.ok_button.clicked.connect(self.accept)
+        self.cancel_button.clicked.connect(self.reject)
+        first_row = QHBoxLayout()
+        first_row.addWidget(QLabel("Layer name"))
+        first_row.addWidget(self.name_line_edit)
+        second_row = QHBoxLayout()
+        second_row.addStretch()
+        second_row.addWidget(self.ok_button)
+        second_row.addWidget(self.cancel_button)
+        layout = QVBoxLayout()
+        layout.addLayout(first_row)
+        layout.addLayout(second_row)
+        self.setLayout(layout)
@@ -5,7 +5,7 @@ It ensures the underlying widgets can talk to each other. It also manages the
 connection to the QGIS Layers Panel, and ensures there is a group for the Tim
 layers there.
 """
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Union
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
@@ -143,21 +143,62 @@ class LayersPanelGroup:
 
         # second argument False: Do not add the maplayer yet to the LayerPanel
         maplayer = QgsProject.instance().addMapLayer(layer, False)
+        self._setup_layer(maplayer, destination, renderer, suppress, on_top, labels)
+        return maplayer
+
+    def add_layers(self, layers: List[Dict[str, Any]]) -> List[QgsMapLayer]:
+        """
+        Add multiple layers to the Layers Panel.
+
+        The layers are registered with the project in a single call, rather
+        than one by one.
+
+        Parameters
+        ----------
+        layers: List[Dict[str, Any]]
+            Keyword arguments of ``add_layer`` per layer. Entries without a
+            layer are skipped.
+
+        Returns
+        -------
+        maplayers: List[QgsMapLayer]
+            The layers that were added, in order.
+        """
+        layers = [kwargs for kwargs in layers if kwargs["layer"] is not None]
+        # second argument False: Do not add the maplayers yet to the LayerPanel
+        QgsProject.instance().addMapLayers(
+            [kwargs["layer"] for kwargs in layers], False
+        )
+        maplayers = []
+        for kwargs in layers:
+            self._setup_layer(**kwargs)
+            maplayers.append(kwargs["layer"])
+        return maplayers
+
+    def _setup_layer(
+        self,
+        layer: QgsMapLayer,
+        destination: Any,
+        renderer: Any = None,
+        suppress: bool = None,
+        on_top: bool = False,
+        labels: Any = None,
+    ) -> None:
         if suppress is not None:
-            config = maplayer.editFormConfig()
+            config = layer.editFormConfig()
             config.setSuppress(
                 QgsEditFormConfig.SuppressOn
                 if suppress
                 else QgsEditFormConfig.SuppressDefault
             )
         if renderer is not None:
-            maplayer.setRenderer(renderer)
+            layer.setRenderer(renderer)
         if labels is not None:
             layer.setLabeling(labels)
             layer.setLabelsEnabled(True)
         # Now add it to the Layers panel.
-        self.add_to_group(maplayer, destination, on_top)
-        return maplayer
+        self.add_to_group(layer, destination, on_top)
+        return
 
 
 class InputGroup(LayersPanelGroup):
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from qgistim.core.elements import parse_name
+
+
+class TestParseName(TestCase):
+    def test_parse_name(self):
+        self.assertEqual(
+            parse_name("timml Well:drainage"), ("timml", "Well", "drainage")
+        )
+        self.assertEqual(
+            parse_name("ttim Head Line Sink:ditch 1"),
+            ("ttim", "Head Line Sink", "ditch 1"),
+        )
+        self.assertEqual(parse_name("timml Head Well:"), ("timml", "Head Well", ""))
+
+    def test_parse_name_mapped(self):
+        self.assertEqual(
+            parse_name("ttim Temporal Settings:Aquifer"),
+            ("ttim", "Aquifer", "Aquifer"),
+        )
+        self.assertEqual(
+            parse_name("ttim Computation Times:Domain"),
+            ("ttim", "Domain", "Domain"),
+        )
+        self.assertEqual(
+            parse_name("timml Polygon Inhomogeneity Properties:pit"),
+            ("timml_assoc", "Polygon Inhomogeneity", "pit"),
+        )
+
+    def test_parse_name_discharge(self):
+        self.assertEqual(
+            parse_name("discharge-timml Well:drainage"),
+            ("timml", "Well", "drainage"),
+        )
+        self.assertEqual(
+            parse_name("discharge-timml Head Line Sink:ditch 1"),
+            ("timml", "Head Line Sink", "ditch 1"),
+        )
+
+    def test_parse_name_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_name("Well:drainage")
+        with self.assertRaises(ValueError):
+            parse_name("timml Well")
@@ -0,0 +1,161 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from osgeo import ogr, osr
+from qgistim.core import geopackage
+
+
+def create_geopackage(path: str) -> None:
+    """Create a GeoPackage with two point layers and an attribute table."""
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(28992)
+    for layername in ("timml Well:a", "timml Well:b"):
+        layer = dataset.CreateLayer(layername, srs, ogr.wkbPoint)
+        field = ogr.FieldDefn("discharge", ogr.OFTReal)
+        field.SetAlternativeName("Discharge")
+        layer.CreateField(field)
+        layer.SetMetadataItem("origin", "test")
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetField("discharge", 1.0)
+        feature.SetGeometry(ogr.CreateGeometryFromWkt("POINT (0 0)"))
+        layer.CreateFeature(feature)
+    dataset.CreateLayer("ttim Well:a", None, ogr.wkbNone)
+    dataset = None
+    return
+
+
+def table_names(path: str):
+    with geopackage.sqlite3_cursor(path) as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {item[0] for item in cursor.fetchall()}
+
+
+def count_rows(path: str, table: str, layername: str) -> int:
+    """Count the rows of a layer in a metadata table; zero if absent."""
+    if table not in table_names(path):
+        return 0
+    with geopackage.sqlite3_cursor(path) as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE table_name = ?", (layername,)
+        )
+        return cursor.fetchone()[0]
+
+
+class TestRemoveLayer(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "model.gpkg")
+        create_geopackage(self.path)
+
+    def tearDown(self):
+        geopackage.invalidate_layers_cache(self.path)
+        self.directory.cleanup()
+
+    def test_remove_layer(self):
+        self.assertIn("rtree_timml Well:a_geom", table_names(self.path))
+        self.assertGreater(count_rows(self.path, "gpkg_extensions", "timml Well:a"), 0)
+
+        geopackage.remove_layer(self.path, "timml Well:a")
+
+        tables = table_names(self.path)
+        self.assertNotIn("timml Well:a", tables)
+        self.assertFalse(any(name.startswith("rtree_timml Well:a") for name in tables))
+        for table in (
+            "gpkg_contents",
+            "gpkg_geometry_columns",
+            "gpkg_extensions",
+            "gpkg_ogr_contents",
+            "gpkg_data_columns",
+            "gpkg_metadata_reference",
+        ):
+            self.assertEqual(count_rows(self.path, table, "timml Well:a"), 0)
+
+        # The other layers are untouched.
+        self.assertIn("timml Well:b", tables)
+        self.assertIn("rtree_timml Well:b_geom", tables)
+        self.assertEqual(count_rows(self.path, "gpkg_contents", "timml Well:b"), 1)
+        self.assertEqual(
+            count_rows(self.path, "gpkg_geometry_columns", "timml Well:b"), 1
+        )
+        self.assertCountEqual(
+            geopackage.layers(self.path), ["timml Well:b", "ttim Well:a"]
+        )
+
+    def test_remove_attribute_table(self):
+        geopackage.remove_layer(self.path, "ttim Well:a")
+        self.assertNotIn("ttim Well:a", table_names(self.path))
+        self.assertEqual(count_rows(self.path, "gpkg_contents", "ttim Well:a"), 0)
+        self.assertEqual(count_rows(self.path, "gpkg_ogr_contents", "ttim Well:a"), 0)
+        self.assertCountEqual(
+            geopackage.layers(self.path), ["timml Well:a", "timml Well:b"]
+        )
+
+    def test_remove_missing_layer(self):
+        geopackage.remove_layer(self.path, "timml Well:c")
+        self.assertCountEqual(
+            geopackage.layers(self.path),
+            ["timml Well:a", "timml Well:b", "ttim Well:a"],
+        )
+
+
+class TestLayersCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "model.gpkg")
+        create_geopackage(self.path)
+
+    def tearDown(self):
+        geopackage.invalidate_layers_cache(self.path)
+        self.directory.cleanup()
+
+    def read_count(self, n: int):
+        """Call layers n times; return the number of reads and the result."""
+        with patch.object(
+            geopackage, "_read_layers", wraps=geopackage._read_layers
+        ) as read_layers:
+            for _ in range(n):
+                result = geopackage.layers(self.path)
+        return read_layers.call_count, result
+
+    def test_cached(self):
+        count, result = self.read_count(3)
+        self.assertEqual(count, 1)
+        self.assertCountEqual(result, ["timml Well:a", "timml Well:b", "ttim Well:a"])
+        # A copy is returned: modifying it does not affect the cache.
+        result.append("timml Well:c")
+        self.assertNotIn("timml Well:c", geopackage.layers(self.path))
+
+    def test_invalidate(self):
+        geopackage.layers(self.path)
+        geopackage.invalidate_layers_cache(self.path)
+        count, _ = self.read_count(1)
+        self.assertEqual(count, 1)
+
+    def test_remove_layer_invalidates(self):
+        geopackage.layers(self.path)
+        geopackage.remove_layer(self.path, "timml Well:a")
+        count, result = self.read_count(1)
+        self.assertEqual(count, 1)
+        self.assertCountEqual(result, ["timml Well:b", "ttim Well:a"])
+
+    def test_external_write(self):
+        # Written outside of the plugin: the change of the file state must
+        # invalidate the cached entry.
+        geopackage.layers(self.path)
+        dataset = ogr.Open(self.path, update=1)
+        dataset.CreateLayer("ttim Well:b", None, ogr.wkbNone)
+        dataset = None
+        count, result = self.read_count(1)
+        self.assertEqual(count, 1)
+        self.assertCountEqual(
+            result, ["timml Well:a", "timml Well:b", "ttim Well:a", "ttim Well:b"]
+        )
+
+    def test_file_state(self):
+        state = geopackage.file_state(self.path)
+        self.assertEqual(len(state), 4)
+        self.assertEqual(state, geopackage.file_state(self.path))
+        self.assertEqual(geopackage.file_state(f"{self.path}.missing"), ())